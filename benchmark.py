@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+####################################################################################################
+## CSV Deduper - Benchmark
+## - Generate reproducible synthetic CSV files and time csv_deduper on them.
+####################################################################################################
+Description:
+  Generates a synthetic CSV file from a seed (so every run of the benchmark reads the very same data),
+  then dedupes it once for every combination of the given chunk sizes, keep modes, with/without
+  sorting and with/without --columns. Every run happens in a fresh process, and its rows/s, MB/s and
+  peak memory (RSS) are written as JSON, to compare settings or releases.
+
+Usage:
+  benchmark.py [-h] [-n ROWS] [-nc COLUMNS] [-kc KEY_CARDINALITY] [-dr DUPLICATE_RATIO] [-fw FIELD_WIDTH] [-qr QUOTED_RATIO] [-mr MULTILINE_RATIO] [-sd SEED] [-ch CHUNKSIZES] [-k KEEP] [-st SORT] [-c COLUMNS_MODES] [-r REPEAT] [-d DATA] [-o OUTPUT]
+  -n ROWS, --rows ROWS
+            Number of data rows to generate (default: 1000000)
+  -nc COLUMNS, --columns COLUMNS
+            Number of columns, at least 3: a key, an integer, a decimal and text columns (default: 8)
+  -kc KEY_CARDINALITY, --key-cardinality KEY_CARDINALITY
+            Number of distinct values of the key column (default: a quarter of the rows)
+  -dr DUPLICATE_RATIO, --duplicate-ratio DUPLICATE_RATIO
+            Share of the rows that are exact copies of an earlier row (default: 0.2)
+  -fw FIELD_WIDTH, --field-width FIELD_WIDTH
+            Number of characters of every text field (default: 16)
+  -qr QUOTED_RATIO, --quoted-ratio QUOTED_RATIO
+            Share of the text fields holding a comma and double quotes, so they must be quoted (default: 0.05)
+  -mr MULTILINE_RATIO, --multiline-ratio MULTILINE_RATIO
+            Share of the text fields holding a line break (default: 0.01)
+  -sd SEED, --seed SEED
+            Seed of the generator, the same seed always generates the same file (default: 1)
+  -ch CHUNKSIZES, --chunksizes CHUNKSIZES
+            Comma-separated list of chunk sizes to run, 'auto' included (default: "10000,50000,200000")
+  -k KEEP, --keep KEEP
+            Comma-separated list of keep modes to run (default: "first,last")
+  -st SORT, --sort SORT
+            Comma-separated list of 'no' (no sorting) and 'yes' (sorted by the integer column) (default: "no,yes")
+  -c COLUMNS_MODES, --columns-modes COLUMNS_MODES
+            Comma-separated list of 'all' (whole rows) and 'key' (--columns key) (default: "all,key")
+  -r REPEAT, --repeat REPEAT
+            Number of times every combination is run, the median is reported (default: 3)
+  -d DATA, --data DATA
+            Path of the generated CSV file. It is kept, and reused if it exists (default: a temporary file)
+  -o OUTPUT, --output OUTPUT
+            Path of the JSON results (default: standard output)
+
+Dependencies:
+  - csv_deduper.py, next to this file (and pandas)
+####################################################################################################
+"""
+import sys
+import os
+import argparse
+import csv
+import json
+import random
+import platform
+import tempfile
+import itertools
+import multiprocessing
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import csv_deduper
+
+default_rows = 1000000
+default_columns = 8
+
+def generate_csv(path, rows, columns=default_columns, key_cardinality=None, duplicate_ratio=0.2, field_width=16, quoted_ratio=0.05, multiline_ratio=0.01, seed=1):
+    """
+    Writes a synthetic CSV file. The same arguments always produce the same file, byte for byte.
+
+    The columns are 'key' (drawn from key_cardinality distinct values), 'number' (an integer), 'amount'
+    (a decimal) and text columns 'text_1', 'text_2', ... of field_width characters. A share of the rows
+    (duplicate_ratio) are exact copies of an earlier row; the other rows are new, but their key may
+    still repeat, so deduping by key removes more rows than deduping whole rows.
+
+    Args:
+        path (str): Path of the CSV file to write.
+        rows (int): Number of data rows.
+        columns (int, optional): Number of columns, at least 3.
+        key_cardinality (int, optional): Number of distinct keys. Defaults to a quarter of the rows.
+        duplicate_ratio (float, optional): Share of the rows that copy an earlier row.
+        field_width (int, optional): Number of characters of every text field.
+        quoted_ratio (float, optional): Share of the text fields holding a comma and double quotes.
+        multiline_ratio (float, optional): Share of the text fields holding a line break.
+        seed (int, optional): Seed of the random generator.
+
+    Returns:
+        dict: The generator settings, with the number of bytes written.
+    """
+    if columns < 3:
+        raise ValueError("columns must be at least 3")
+    key_cardinality = key_cardinality or max(1, rows // 4)
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 '
+    text_columns = columns - 3
+    recent = []                                                             # Earlier rows that duplicates are copied from
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle, lineterminator='\n')
+        writer.writerow(['key', 'number', 'amount'] + [f"text_{i + 1}" for i in range(text_columns)])
+        for _ in range(rows):
+            if recent and rng.random() < duplicate_ratio:
+                row = recent[rng.randrange(len(recent))]
+            else:
+                row = [f"K{rng.randrange(key_cardinality):012d}", str(rng.randrange(1000000)), f"{rng.uniform(0, 10000):.2f}"]
+                for _ in range(text_columns):
+                    text = ''.join(rng.choices(letters, k=field_width))
+                    draw = rng.random()
+                    if draw < multiline_ratio:
+                        text = text[:field_width // 2] + '\n' + text[field_width // 2 + 1:]
+                    elif draw < multiline_ratio + quoted_ratio:
+                        text = text[:field_width // 2] + ',"' + text[field_width // 2 + 2:] # csv.writer quotes the field and doubles the quote
+                    row.append(text)
+                if len(recent) < 100000:
+                    recent.append(row)
+                else:
+                    recent[rng.randrange(len(recent))] = row                # Keep a bounded sample of earlier rows to copy from
+            writer.writerow(row)
+    return {'rows': rows, 'columns': columns, 'key_cardinality': key_cardinality, 'duplicate_ratio': duplicate_ratio,
+            'field_width': field_width, 'quoted_ratio': quoted_ratio, 'multiline_ratio': multiline_ratio, 'seed': seed,
+            'bytes': os.path.getsize(path)}
+
+def run_case(input_file, output_file, options):
+    """Dedupes the file once with the given Deduper options. Runs in its own process, so the peak memory is that of this run alone."""
+    result = csv_deduper.Deduper(**options).run(input_file, output_file)
+    return {'engine': result.engine, 'elapsed': result.elapsed, 'rows_read': result.rows_read, 'rows_written': result.rows_written,
+            'input_bytes': result.input_bytes, 'output_bytes': result.output_bytes, 'peak_rss_bytes': csv_deduper.peak_memory_bytes()}
+
+def run_benchmarks(input_file, chunk_sizes, keep_modes, sort_modes, columns_modes, repeat=3):
+    """
+    Dedupes the file once per combination of the settings (and per repeat), every time in a fresh process.
+
+    Args:
+        input_file (str): Path of the CSV file (ie: from generate_csv).
+        chunk_sizes (list): Chunk sizes to run (numbers or 'auto').
+        keep_modes (list): 'first' and/or 'last'.
+        sort_modes (list): False (no sorting) and/or True (sorted by the 'number' column).
+        columns_modes (list): 'all' (whole rows) and/or 'key' (dedupe by the 'key' column).
+        repeat (int, optional): Number of runs per combination. The median run is reported.
+
+    Returns:
+        list: One dict per combination: the settings, rows/s, MB/s (10^6 bytes of input per second), the peak RSS and the counts.
+    """
+    context = multiprocessing.get_context('spawn')                          # A fresh interpreter per run, so nothing is shared between runs
+    results = []
+    with tempfile.TemporaryDirectory(prefix='csv-deduper-bench-') as temp_dir:
+        output_file = os.path.join(temp_dir, 'output.csv')
+        for chunk_size, keep, sort, columns_mode in itertools.product(chunk_sizes, keep_modes, sort_modes, columns_modes):
+            options = {'chunk_size': chunk_size, 'keep': keep, 'columns': ['key'] if columns_mode == 'key' else None, 'sort_columns': ['number'] if sort else None}
+            runs = []
+            for _ in range(repeat):
+                with context.Pool(1) as pool:
+                    runs.append(pool.apply(run_case, (input_file, output_file, options)))
+                print(f"chunksize={chunk_size} keep={keep} sort={'yes' if sort else 'no'} columns={columns_mode}: {runs[-1]['elapsed']:.2f} sec", file=sys.stderr)
+            run = sorted(runs, key=lambda r: r['elapsed'])[len(runs) // 2]
+            results.append({'chunk_size': chunk_size, 'keep': keep, 'sort': sort, 'columns': columns_mode, 'engine': run['engine'],
+                            'elapsed_seconds': round(run['elapsed'], 4), 'elapsed_all': [round(r['elapsed'], 4) for r in runs],
+                            'rows_per_second': round(run['rows_read'] / run['elapsed']), 'mb_per_second': round(run['input_bytes'] / run['elapsed'] / 1e6, 2),
+                            'peak_rss_bytes': max((r['peak_rss_bytes'] for r in runs if r['peak_rss_bytes'] is not None), default=None),
+                            'rows_read': run['rows_read'], 'rows_written': run['rows_written'], 'input_bytes': run['input_bytes'], 'output_bytes': run['output_bytes']})
+    return results
+
+def parse_list(value, convert=str):
+    """Splits a comma-separated argument into a list of converted values."""
+    return [convert(item.strip()) for item in value.split(',') if item.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic CSV file and benchmark csv_deduper on it, writing the results as JSON.")
+    parser.add_argument("-n", "--rows", type=int, default=default_rows, help=f"Number of data rows to generate (default: {default_rows})")
+    parser.add_argument("-nc", "--columns", type=int, default=default_columns, help=f"Number of columns, at least 3 (default: {default_columns})")
+    parser.add_argument("-kc", "--key-cardinality", type=int, default=None, help="Number of distinct values of the key column (default: a quarter of the rows)")
+    parser.add_argument("-dr", "--duplicate-ratio", type=float, default=0.2, help="Share of the rows that are exact copies of an earlier row (default: 0.2)")
+    parser.add_argument("-fw", "--field-width", type=int, default=16, help="Number of characters of every text field (default: 16)")
+    parser.add_argument("-qr", "--quoted-ratio", type=float, default=0.05, help="Share of the text fields that must be quoted (default: 0.05)")
+    parser.add_argument("-mr", "--multiline-ratio", type=float, default=0.01, help="Share of the text fields holding a line break (default: 0.01)")
+    parser.add_argument("-sd", "--seed", type=int, default=1, help="Seed of the generator (default: 1)")
+    parser.add_argument("-ch", "--chunksizes", default="10000,50000,200000", help="Comma-separated list of chunk sizes, 'auto' included (default: \"10000,50000,200000\")")
+    parser.add_argument("-k", "--keep", default="first,last", help="Comma-separated list of keep modes (default: \"first,last\")")
+    parser.add_argument("-st", "--sort", default="no,yes", help="Comma-separated list of 'no' and 'yes' (sorted by the integer column) (default: \"no,yes\")")
+    parser.add_argument("-c", "--columns-modes", default="all,key", help="Comma-separated list of 'all' (whole rows) and 'key' (--columns key) (default: \"all,key\")")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Number of runs per combination, the median is reported (default: 3)")
+    parser.add_argument("-d", "--data", default=None, help="Path of the generated CSV file, kept and reused if it exists (default: a temporary file)")
+    parser.add_argument("-o", "--output", default=None, help="Path of the JSON results (default: standard output)")
+    args = parser.parse_args()
+
+    chunk_sizes = parse_list(args.chunksizes, lambda size: size if size == 'auto' else int(size))
+    keep_modes = parse_list(args.keep)
+    sort_modes = [mode == 'yes' for mode in parse_list(args.sort)]
+    columns_modes = parse_list(args.columns_modes)
+    if any(mode not in ('first', 'last') for mode in keep_modes) or any(mode not in ('all', 'key') for mode in columns_modes):
+        parser.error("--keep takes 'first'/'last' and --columns-modes takes 'all'/'key'")
+
+    with tempfile.TemporaryDirectory(prefix='csv-deduper-bench-data-') as temp_dir:
+        data_file = args.data or os.path.join(temp_dir, 'bench.csv')
+        settings = {'rows': args.rows, 'columns': args.columns, 'key_cardinality': args.key_cardinality, 'duplicate_ratio': args.duplicate_ratio,
+                    'field_width': args.field_width, 'quoted_ratio': args.quoted_ratio, 'multiline_ratio': args.multiline_ratio, 'seed': args.seed}
+        if args.data and os.path.exists(args.data):
+            dataset = {'path': args.data, 'bytes': os.path.getsize(args.data)}  # Reused as it is, whatever it was generated with
+        else:
+            print(f"Generating {args.rows:,} rows...", file=sys.stderr)
+            dataset = generate_csv(data_file, **settings)
+        results = run_benchmarks(data_file, chunk_sizes, keep_modes, sort_modes, columns_modes, args.repeat)
+
+    import pandas
+    report = {'csv_deduper_version': csv_deduper.__version__, 'python': platform.python_version(), 'pandas': pandas.__version__,
+              'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+              'dataset': dataset, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print("")
+
+if __name__ == "__main__":
+    main()
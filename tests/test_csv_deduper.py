@@ -0,0 +1,525 @@
+import csv
+import gzip
+import io
+import os
+import random
+import subprocess
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_dir)
+
+import csv_deduper
+from csv_deduper import AdaptiveChunkSize, Deduper, UnsortedInputError, prefetch_chunks
+
+
+def write_csv(tmp_path, text, name='input.csv'):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8', newline='')
+    return str(path)
+
+
+def read_output(path):
+    with open(path, encoding='utf-8', newline='') as handle:
+        return handle.read().replace('\r\n', '\n')
+
+
+def make_rows(count=600, seed=0):
+    """Rows with repeated keys, exact duplicates, missing values, quotes, commas and newlines inside fields (ids are never missing,
+    as an integer column with missing values is read as floats when it is not a key)."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        if rows and rng.random() < 0.3:
+            rows.append(list(rng.choice(rows)))
+            continue
+        rows.append([str(rng.randrange(150)),
+                     rng.choice(['a', 'b', 'c', '']),
+                     rng.choice(['1', '2.5', '-3', '10', '', 'x']),
+                     rng.choice(['plain', 'with, comma', 'with "quotes"', 'two\nlines', '']) + str(rng.randrange(3))])
+    return rows
+
+
+def write_rows(tmp_path, rows, name='input.csv', lineterminator='\n'):
+    path = tmp_path / name
+    with open(path, 'w', encoding='utf-8', newline='') as handle:
+        writer = csv.writer(handle, lineterminator=lineterminator)
+        writer.writerow(['id', 'group', 'amount', 'note'])
+        writer.writerows(rows)
+    return str(path)
+
+
+def read_frame(path, **args):
+    return pd.read_csv(path, dtype=str, keep_default_na=False, **args)
+
+
+def expected_rows(input_file, columns=None, keep='first'):
+    """The rows pandas keeps, as the reference every engine is checked against."""
+    return read_frame(input_file).drop_duplicates(subset=columns, keep=keep).reset_index(drop=True)
+
+
+def assert_same_rows(actual, expected):
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+@pytest.mark.parametrize('options', [{}, {'pipeline': True}, {'fingerprint': 64}, {'columns': ['a']}])
+def test_header_only_input_keeps_header_streaming(tmp_path, options):
+    input_file = write_csv(tmp_path, 'a,b\n')
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(**options).run(input_file, output_file)
+    assert read_output(output_file) == 'a,b\n'
+    assert (result.rows_read, result.rows_written) == (0, 0)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 10000])
+@pytest.mark.parametrize('columns', [None, ['id'], ['group', 'amount']])
+def test_streaming_keep_first_matches_pandas(tmp_path, columns, chunk_size):
+    input_file = write_rows(tmp_path, make_rows())
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(columns=columns, chunk_size=chunk_size).run(input_file, output_file)
+    expected = expected_rows(input_file, columns)
+    assert result.engine == 'streaming'
+    assert (result.rows_read, result.rows_written) == (600, len(expected))
+    assert_same_rows(read_frame(output_file), expected)
+
+
+
+@pytest.mark.parametrize('chunk_size', [7, 10000])
+@pytest.mark.parametrize('columns', [None, ['id'], ['group', 'amount']])
+def test_two_pass_keep_last_matches_pandas(tmp_path, columns, chunk_size):
+    input_file = write_rows(tmp_path, make_rows())
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(columns=columns, keep='last', chunk_size=chunk_size).run(input_file, output_file)
+    expected = expected_rows(input_file, columns, keep='last')
+    assert result.engine == 'two-pass'
+    assert result.rows_written == len(expected)
+    assert_same_rows(read_frame(output_file), expected)
+
+
+@pytest.mark.parametrize('keep', ['first', 'last'])
+@pytest.mark.parametrize('columns', [None, ['id']])
+def test_memory_limit_spills_and_matches_pandas(tmp_path, monkeypatch, columns, keep):
+    spilled = []
+
+    class RecordingPartitioner(csv_deduper.SpillPartitioner):
+        def add(self, *args, **kwargs):
+            spilled.append(True)
+            return super().add(*args, **kwargs)
+
+    monkeypatch.setattr(csv_deduper, 'SpillPartitioner', RecordingPartitioner)
+    input_file = write_rows(tmp_path, make_rows())
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(columns=columns, keep=keep, chunk_size=50, memory_limit=1).run(input_file, output_file)
+    expected = expected_rows(input_file, columns, keep=keep)
+    assert spilled
+    assert result.rows_written == len(expected)
+    assert_same_rows(read_frame(output_file), expected)
+
+
+def sort_rows(frame, sort_columns, sort_orders):
+    """Sorts like the output sort: numbers before text (after it descending), missing values last, ties in input order."""
+    def value_key(value, ascending):
+        if value == '':
+            return (2,) if ascending else (-1,)
+        try:
+            return (0, float(value))
+        except ValueError:
+            return (1, value)
+    rows = list(frame.itertuples(index=False))
+    for name, order in reversed(list(zip(sort_columns, sort_orders))):
+        position = list(frame.columns).index(name)
+        rows.sort(key=lambda row: value_key(row[position], order == 'asc'), reverse=(order == 'desc'))
+    return pd.DataFrame(rows, columns=frame.columns)
+
+
+@pytest.mark.parametrize('sort_columns, sort_orders', [(['amount'], ['asc']), (['amount'], ['desc']), (['group', 'amount'], ['asc', 'desc']), (['group', 'note'], ['desc', 'asc'])])
+@pytest.mark.parametrize('keep', ['first', 'last'])
+def test_external_sort_matches_sorted_pandas(tmp_path, sort_columns, sort_orders, keep):
+    input_file = write_rows(tmp_path, make_rows())
+    output_file = str(tmp_path / 'output.csv')
+    Deduper(columns=['id'], keep=keep, sort_columns=sort_columns, sort_orders=sort_orders, chunk_size=50).run(input_file, output_file)
+    expected = sort_rows(expected_rows(input_file, ['id'], keep=keep), sort_columns, sort_orders)
+    assert_same_rows(read_frame(output_file), expected)
+
+
+@pytest.mark.parametrize('keep', ['first', 'last'])
+@pytest.mark.parametrize('columns', [None, ['id']])
+def test_workers_keep_input_order_and_match_pandas(tmp_path, columns, keep):
+    input_file = write_rows(tmp_path, make_rows(count=3000))
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(columns=columns, keep=keep, workers=3, chunk_size=100).run(input_file, output_file)
+    expected = expected_rows(input_file, columns, keep=keep)
+    assert result.engine == 'parallel'
+    assert (result.rows_read, result.rows_written) == (3000, len(expected))
+    assert_same_rows(read_frame(output_file), expected)
+
+
+@pytest.mark.parametrize('lineterminator', ['\n', '\r\n'])
+@pytest.mark.parametrize('keep', ['first', 'last'])
+def test_key_pass_with_quoted_newlines_matches_pandas(tmp_path, keep, lineterminator):
+    input_file = write_rows(tmp_path, make_rows(), lineterminator=lineterminator)
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(columns=['id', 'note'], keep=keep, key_pass=True, chunk_size=40).run(input_file, output_file)
+    expected = expected_rows(input_file, ['id', 'note'], keep=keep)
+    assert result.engine == 'key-pass'
+    assert result.rows_written == len(expected)
+    assert_same_rows(read_frame(output_file), expected)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 100])
+@pytest.mark.parametrize('text', [
+    'id,v\n1,a\n1.0,b\n1,c\n2,d\n',                                     # Same number, different text
+    'id,v\n1,a\n,b\n1,c\n2,d\n',                                        # A value back after a missing one
+    'id,v\n,a\n1,b\n,c\n',                                              # A missing value back after a value
+])
+def test_assume_sorted_detects_ungrouped_keys(tmp_path, text, chunk_size):
+    input_file = write_csv(tmp_path, text)
+    with pytest.raises(UnsortedInputError):
+        Deduper(columns=['id'], assume_sorted=True, chunk_size=chunk_size).run(input_file, str(tmp_path / 'output.csv'))
+
+
+def test_assume_sorted_detects_input_sorted_by_first_key_column_only(tmp_path):
+    input_file = write_csv(tmp_path, 'id,val\n1,x\n1,\n1,x\n2,y\n2,\n2,y\n')
+    with pytest.raises(UnsortedInputError):
+        Deduper(columns=['id', 'val'], assume_sorted=True).run(input_file, str(tmp_path / 'output.csv'))
+
+
+@pytest.mark.parametrize('na_position', ['first', 'last'])
+def test_assume_sorted_accepts_missing_values_first_or_last(tmp_path, na_position):
+    rows = ['1,a', '1,b', '2,a', '10,c']
+    missing = [',a', ',d']
+    text = 'id,v\n' + '\n'.join(missing + rows if na_position == 'first' else rows + missing) + '\n'
+    input_file = write_csv(tmp_path, text)
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(columns=['id'], assume_sorted=True, chunk_size=2).run(input_file, output_file)
+    assert result.rows_written == 4
+
+
+def test_header_only_input_keeps_header_sorted(tmp_path):
+    input_file = write_csv(tmp_path, 'a,b\n')
+    output_file = str(tmp_path / 'output.csv')
+    Deduper(columns=['a'], assume_sorted=True).run(input_file, output_file)
+    assert read_output(output_file) == 'a,b\n'
+
+
+@pytest.mark.parametrize('options', [{}, {'fingerprint': 64}, {'fingerprint': 128, 'pipeline': True}, {'columns': None}])
+def test_checkpoint_resume_after_interrupt_is_byte_identical(tmp_path, monkeypatch, options):
+    monkeypatch.setattr(csv_deduper, 'checkpoint_segment_bytes', 2000)
+    input_file = write_rows(tmp_path, make_rows(count=2000))
+    columns = options.pop('columns', ['id', 'group'])
+    expected_file = str(tmp_path / 'expected.csv')
+    Deduper(columns=columns, chunk_size=30, **options).run(input_file, expected_file)
+
+    segment_end = csv_deduper.find_segment_end
+    segments = []
+
+    def interrupted_segment_end(*args):
+        segments.append(args)
+        if len(segments) == 5:
+            raise KeyboardInterrupt
+        return segment_end(*args)
+
+    output_file = str(tmp_path / 'output.csv')
+    monkeypatch.setattr(csv_deduper, 'find_segment_end', interrupted_segment_end)
+    with pytest.raises(KeyboardInterrupt):
+        Deduper(columns=columns, chunk_size=30, checkpoint=0, **options).run(input_file, output_file)
+    monkeypatch.setattr(csv_deduper, 'find_segment_end', segment_end)
+    assert os.path.exists(output_file + '.checkpoint')
+    result = Deduper(columns=columns, chunk_size=30, resume=True, checkpoint=0, **options).run(input_file, output_file)
+    assert 0 < result.resumed_rows < result.rows_read == 2000
+    with open(output_file, 'rb') as output, open(expected_file, 'rb') as expected:
+        assert output.read() == expected.read()
+    assert not os.path.exists(output_file + '.checkpoint')
+    assert_same_rows(read_frame(output_file), expected_rows(input_file, columns))
+
+
+def test_header_only_input_keeps_header_with_checkpoint(tmp_path):
+    input_file = write_csv(tmp_path, 'a,b\n')
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(checkpoint=0).run(input_file, output_file)
+    assert read_output(output_file) == 'a,b\n'
+    assert (result.rows_read, result.rows_written) == (0, 0)
+    assert not os.path.exists(output_file + '.checkpoint')
+
+
+@pytest.mark.parametrize('keep', ['first', 'last'])
+def test_verify_recovers_from_fingerprint_collisions(tmp_path, monkeypatch, keep):
+    fingerprints = csv_deduper.get_chunk_fingerprints
+    monkeypatch.setattr(csv_deduper, 'get_chunk_fingerprints', lambda chunk, columns, bits: fingerprints(chunk, columns, bits) & csv_deduper.np.uint64(3)) # Four fingerprints for all the keys
+    input_file = write_rows(tmp_path, make_rows())
+    expected = expected_rows(input_file, ['id'], keep=keep)
+    collided = Deduper(columns=['id'], keep=keep, fingerprint=64).run(input_file, str(tmp_path / 'collided.csv'))
+    assert collided.rows_written <= 4
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(columns=['id'], keep=keep, fingerprint=64, verify=True, chunk_size=50).run(input_file, output_file)
+    assert result.rows_written == len(expected)
+    assert_same_rows(read_frame(output_file), expected)
+
+
+@pytest.mark.parametrize('fingerprint', [None, 64])
+@pytest.mark.parametrize('lineterminator', ['\n', '\r\n'])
+@pytest.mark.parametrize('keep', ['first', 'last'])
+def test_raw_copies_unique_records_byte_for_byte(tmp_path, keep, lineterminator, fingerprint):
+    rows = make_rows()
+    input_file = write_rows(tmp_path, rows, lineterminator=lineterminator)
+    output_file = str(tmp_path / 'output.csv')
+    result = Deduper(keep=keep, raw=True, fingerprint=fingerprint).run(input_file, output_file)
+    records = []
+    for row in rows:
+        line = io.StringIO()
+        csv.writer(line, lineterminator=lineterminator).writerow(row)
+        records.append(line.getvalue())
+    kept = {}
+    for i, record in enumerate(records):
+        if keep == 'last' or record not in kept:
+            kept[record] = i
+    unique = [record for i, record in enumerate(records) if kept[record] == i]
+    with open(input_file, encoding='utf-8', newline='') as handle:
+        header = handle.read().split(lineterminator, 1)[0] + lineterminator
+    with open(output_file, encoding='utf-8', newline='') as handle:
+        assert handle.read() == header + ''.join(unique)
+    assert result.engine == 'raw'
+    assert result.rows_written == len(unique)
+
+
+def write_shards(tmp_path, count=3):
+    rows = make_rows(count=900)
+    return [write_rows(tmp_path, rows[i::count], name=f'shard{i}.csv') for i in range(count)]
+
+
+@pytest.mark.parametrize('fingerprint', [None, 64])
+@pytest.mark.parametrize('keep', ['first', 'last'])
+def test_across_files_merged_output_matches_pandas(tmp_path, keep, fingerprint):
+    input_files = write_shards(tmp_path)
+    output_file = str(tmp_path / 'merged.csv')
+    results = Deduper(columns=['id', 'group'], keep=keep, fingerprint=fingerprint, chunk_size=40).run_across(input_files, output_file)
+    expected = pd.concat([read_frame(input_file) for input_file in input_files]).drop_duplicates(['id', 'group'], keep=keep)
+    assert sum(result.rows_written for result in results) == len(expected)
+    assert_same_rows(read_frame(output_file), expected)
+
+
+def test_across_files_per_file_outputs_match_pandas(tmp_path):
+    input_files = write_shards(tmp_path)
+    output_files = [str(tmp_path / f'output{i}.csv') for i in range(len(input_files))]
+    Deduper(columns=['id']).run_across(input_files, output_files)
+    frames = [read_frame(input_file).assign(source=i) for i, input_file in enumerate(input_files)]
+    expected = pd.concat(frames).drop_duplicates(['id'])
+    for i, output_file in enumerate(output_files):
+        assert_same_rows(read_frame(output_file), expected[expected['source'] == i].drop(columns='source'))
+
+
+def test_many_files_are_deduped_on_their_own(tmp_path):
+    input_files = write_shards(tmp_path)
+    output_files = [str(tmp_path / f'output{i}.csv') for i in range(len(input_files))]
+    Deduper(columns=['id']).run_many(input_files, output_files, jobs=2)
+    for input_file, output_file in zip(input_files, output_files):
+        assert_same_rows(read_frame(output_file), expected_rows(input_file, ['id']))
+
+
+def run_cli(args, stdin):
+    return subprocess.run([sys.executable, os.path.join(repo_dir, 'csv-deduper.py')] + args, input=stdin, capture_output=True, check=True)
+
+
+@pytest.mark.parametrize('keep', ['first', 'last'])
+def test_stdin_to_stdout_matches_pandas(tmp_path, keep):
+    input_file = write_rows(tmp_path, make_rows())
+    with open(input_file, 'rb') as handle:
+        completed = run_cli(['-', '-c', 'id,group', '-k', keep, '-ch', '50'], handle.read())
+    assert_same_rows(read_frame(io.BytesIO(completed.stdout)), expected_rows(input_file, ['id', 'group'], keep=keep))
+
+
+def test_gzip_stdin_to_gzip_output(tmp_path):
+    input_file = write_rows(tmp_path, make_rows())
+    output_file = str(tmp_path / 'output.csv.gz')
+    with open(input_file, 'rb') as handle:
+        run_cli(['-', '-c', 'id', '-o', output_file], gzip.compress(handle.read()))
+    with gzip.open(output_file, 'rb') as handle:
+        assert_same_rows(read_frame(handle), expected_rows(input_file, ['id']))
+
+
+@pytest.mark.parametrize('options', [{}, {'keep': 'last'}, {'key_pass': True}])
+@pytest.mark.parametrize('extension', ['.gz', '.bz2', '.xz'])
+def test_compressed_input_and_output_round_trip(tmp_path, extension, options):
+    plain_file = write_rows(tmp_path, make_rows())
+    input_file = str(tmp_path / f'input.csv{extension}')
+    read_frame(plain_file).to_csv(input_file, index=False)
+    output_file = str(tmp_path / f'output.csv{extension}')
+    Deduper(columns=['id'], chunk_size=50, **options).run(input_file, output_file)
+    assert_same_rows(read_frame(output_file), expected_rows(plain_file, ['id'], keep=options.get('keep', 'first')))
+
+
+def as_text(frame):
+    return frame.astype(object).where(frame.notna(), '').astype(str).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('keep', ['first', 'last'])
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_csv_to_columnar_output_matches_pandas(tmp_path, extension, keep):
+    pytest.importorskip('pyarrow')
+    input_file = write_rows(tmp_path, make_rows())
+    output_file = str(tmp_path / f'output{extension}')
+    Deduper(columns=['id'], keep=keep, chunk_size=50).run(input_file, output_file)
+    output = pd.read_parquet(output_file) if extension == '.parquet' else pd.read_feather(output_file)
+    assert_same_rows(as_text(output), expected_rows(input_file, ['id'], keep=keep))
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_columnar_input_round_trip_keeps_types(tmp_path, extension):
+    pytest.importorskip('pyarrow')
+    rng = random.Random(0)
+    frame = pd.DataFrame({'id': [rng.randrange(50) for i in range(500)],
+                          'amount': [rng.choice([1.5, -2.0, None]) for i in range(500)],
+                          'name': [rng.choice(['a', 'b', None]) for i in range(500)],
+                          'flag': [rng.choice([True, False]) for i in range(500)]})
+    input_file = str(tmp_path / f'input{extension}')
+    output_file = str(tmp_path / f'output{extension}')
+    frame.to_parquet(input_file) if extension == '.parquet' else frame.to_feather(input_file)
+    Deduper(columns=['id', 'name'], chunk_size=64).run(input_file, output_file)
+    output = pd.read_parquet(output_file) if extension == '.parquet' else pd.read_feather(output_file)
+    pd.testing.assert_frame_equal(output, frame.drop_duplicates(['id', 'name']).reset_index(drop=True))
+
+
+@pytest.mark.parametrize('options', [{}, {'keep': 'last'}, {'pipeline': True}, {'columns': None}])
+def test_auto_chunk_size_adjusts_and_matches_pandas(tmp_path, monkeypatch, options):
+    monkeypatch.setattr(csv_deduper, 'auto_chunk_min_size', 10)
+    monkeypatch.setattr(csv_deduper, 'auto_chunk_memory', 200 * 1024)     # Chunks of a few hundred rows at most
+    input_file = write_rows(tmp_path, make_rows(count=5000))
+    output_file = str(tmp_path / 'output.csv')
+    columns = options.pop('columns', ['id', 'group'])
+    result = Deduper(columns=columns, chunk_size='auto', stats=True, **options).run(input_file, output_file)
+    sizes = result.stats['chunk_size']
+    assert 10 <= sizes['smallest'] < sizes['largest'] <= sizes['max_size']
+    assert_same_rows(read_frame(output_file), expected_rows(input_file, columns, keep=options.get('keep', 'first')))
+
+
+def test_adaptive_chunk_size_follows_throughput_within_limits(monkeypatch):
+    monkeypatch.setattr(csv_deduper, 'auto_chunk_min_size', 10)
+    size = AdaptiveChunkSize(100, 200)
+    for i in range(csv_deduper.auto_chunk_window):
+        size.observe(100, 1.0)
+    assert int(size) == 150                                                 # Grows first
+    for i in range(csv_deduper.auto_chunk_window):
+        size.observe(150, 3.0)
+    assert int(size) == 100                                                 # Slower: steps back
+    for i in range(csv_deduper.auto_chunk_window):
+        size.observe(100, 0.1)
+    assert int(size) == 66                                                  # Faster: keeps shrinking
+    size.resize(1000)
+    assert int(size) == 200 and size.largest == 200
+    monkeypatch.setattr(csv_deduper, 'current_memory_bytes', lambda: 2 * 1024**3)
+    size.memory_ceiling = 1024**3
+    size.observe(200, 1.0)
+    assert (int(size), size.max_size) == (100, 100)                         # Memory running out: halved
+
+
+large_integer_ids = [9007199254740992, 9007199254740993, 1234567890123456789, 1234567890123456788]
+
+
+@pytest.mark.parametrize('bits', [64, 128])
+def test_fingerprints_keep_large_integer_keys_apart_parquet(tmp_path, bits):
+    pytest.importorskip('pyarrow')
+    input_file = str(tmp_path / 'input.parquet')
+    pd.DataFrame({'id': large_integer_ids, 'v': list('abcd')}).to_parquet(input_file)
+    result = Deduper(columns=['id'], fingerprint=bits).run(input_file, str(tmp_path / 'output.csv'))
+    assert result.rows_written == 4
+
+
+@pytest.mark.parametrize('dtypes', ['sample', 'infer'])
+@pytest.mark.parametrize('bits', [64, 128])
+def test_fingerprints_keep_large_integer_keys_apart_typed_csv(tmp_path, dtypes, bits):
+    text = 'id,v\n' + ''.join(f'{key},{i}\n' for i, key in enumerate(large_integer_ids + large_integer_ids[:1]))
+    input_file = write_csv(tmp_path, text)
+    result = Deduper(columns=['id'], fingerprint=bits, dtypes=dtypes).run(input_file, str(tmp_path / 'output.csv'))
+    assert result.rows_written == 4
+
+
+def test_fingerprints_match_equal_numbers_of_any_type(tmp_path):
+    input_file = write_csv(tmp_path, 'id,v\n1,a\n-0,b\n2,c\n1.0,d\n0.0,e\n,f\n2.5,g\n,h\n')
+    result = Deduper(columns=['id'], fingerprint=64, dtypes='infer', chunk_size=3).run(input_file, str(tmp_path / 'output.csv'))
+    assert result.rows_written == 5
+
+
+@pytest.mark.parametrize('fingerprint', [None, 128])
+def test_index_dedupes_appended_data_incrementally(tmp_path, fingerprint):
+    input_files = write_shards(tmp_path)
+    index_file = str(tmp_path / 'keys.idx')
+    outputs = []
+    for i, input_file in enumerate(input_files):
+        output_file = str(tmp_path / f'output{i}.csv')
+        Deduper(columns=['id', 'group'], index=index_file, fingerprint=fingerprint, chunk_size=40).run(input_file, output_file)
+        outputs.append(read_frame(output_file))
+    expected = pd.concat([read_frame(input_file) for input_file in input_files]).drop_duplicates(['id', 'group'])
+    assert_same_rows(pd.concat(outputs), expected)
+    rerun = Deduper(columns=['id', 'group'], index=index_file, fingerprint=fingerprint).run(input_files[1], str(tmp_path / 'rerun.csv'))
+    assert rerun.rows_written == 0
+
+
+def test_index_across_files_then_incremental(tmp_path):
+    input_files = write_shards(tmp_path)
+    index_file = str(tmp_path / 'keys.idx')
+    Deduper(columns=['id'], index=index_file).run_across(input_files[:2], str(tmp_path / 'merged.csv'))
+    Deduper(columns=['id'], index=index_file).run(input_files[2], str(tmp_path / 'output.csv'))
+    expected = pd.concat([read_frame(input_file) for input_file in input_files]).drop_duplicates(['id'])
+    assert_same_rows(pd.concat([read_frame(str(tmp_path / 'merged.csv')), read_frame(str(tmp_path / 'output.csv'))]), expected)
+
+
+def test_index_keeps_large_integer_keys_apart(tmp_path):
+    pytest.importorskip('pyarrow')
+    input_file = str(tmp_path / 'input.parquet')
+    pd.DataFrame({'id': large_integer_ids, 'v': list('abcd')}).to_parquet(input_file)
+    index_file = str(tmp_path / 'keys.idx')
+    assert Deduper(columns=['id'], index=index_file).run(input_file, str(tmp_path / 'output.csv')).rows_written == 4
+    assert Deduper(columns=['id'], index=index_file).run(input_file, str(tmp_path / 'rerun.csv')).rows_written == 0
+
+
+def test_index_can_not_be_combined_with_jobs(tmp_path):
+    input_files = [write_csv(tmp_path, 'k\n1\n', name=f'input{i}.csv') for i in range(2)]
+    with pytest.raises(ValueError):
+        Deduper(columns=['k'], index=str(tmp_path / 'keys.idx')).run_many(input_files, jobs=2)
+
+
+def test_prefetch_chunks_can_be_closed_in_reader_thread():
+    received, closed = threading.Event(), threading.Event()
+
+    def chunks():
+        yield 1
+        received.wait(5)
+        prefetched.close()                                                  # As when garbage collection finalizes it there
+        closed.set()
+        yield 2
+
+    prefetched = prefetch_chunks(chunks())
+    assert next(prefetched) == 1
+    received.set()
+    assert closed.wait(5)
+
+
+@pytest.fixture(scope='module')
+def benchmark_input(tmp_path_factory):
+    import benchmark
+    input_file = str(tmp_path_factory.mktemp('estimate') / 'input.csv')
+    benchmark.generate_csv(input_file, 60000)                               # 15,000 keys, a fifth of the rows copied
+    return input_file
+
+
+@pytest.mark.parametrize('columns', [['key'], None])
+@pytest.mark.parametrize('share, error', [(0.1, 0.25), (0.3, 0.1)])
+def test_estimate_bounds_its_error_on_benchmark_input(benchmark_input, monkeypatch, columns, share, error):
+    monkeypatch.setattr(csv_deduper, 'estimate_sample_bytes', int(os.path.getsize(benchmark_input) * share))
+    actual = len(read_frame(benchmark_input).drop_duplicates(columns))
+    estimate = Deduper(columns=columns).estimate(benchmark_input)
+    assert abs(estimate.sampled_share - share) < 0.02
+    assert abs(estimate.rows_written / actual - 1) < error
+    assert estimate.rows_written_low <= actual <= estimate.rows_written_high
+    assert estimate.as_dict()['rows_written_low'] == estimate.rows_written_low
+
+
+def test_estimate_of_whole_small_input_is_exact(tmp_path):
+    input_file = write_rows(tmp_path, make_rows())
+    estimate = Deduper(columns=['id', 'group']).estimate(input_file)
+    assert estimate.exact
+    assert estimate.rows_written_low == estimate.rows_written == estimate.rows_written_high == len(expected_rows(input_file, ['id', 'group'], keep='first'))